@@ -0,0 +1,225 @@
+"""
+Reads and writes transmissions as streams of bits, with each element of a
+field of size 2^k taking k bits, e.g. 3 bits for F_8 and 4 bits for F_16.
+
+An element a0 + a1*x + ... + a(k-1)*x^(k-1) is written as the bits
+a(k-1)...a1 a0, the same way as FFieldElt prints it, and the elements are
+written one after the other with the last byte padded with 0's. A stream of
+transmissions is just the stream of all of their entries.
+
+The stream has no framing: it does not record how many elements or
+transmissions it holds. When n*k is not a multiple of 8, the padding in the
+last byte can look like more elements, so the reader should be given the real
+count, e.g. one F_8 message of length 1 is packed as '\x80', which holds two
+3-bit elements.
+"""
+
+import numpy as np
+from FiniteFields import *
+
+# an array of the FFieldElt objects of each field indexed by their value,
+# see GetEltTable
+eltTables = {}
+
+# the number of elements packed or unpacked at a time, a multiple of 8 so
+# that each chunk starts at the beginning of a byte
+CHUNK_SIZE = 2**18
+
+def GetDegree(F = FiniteField((1, 1, 0, 1))):
+    """
+    Returns k where F is the field of size 2^k, i.e. the number of bits in
+    each packed element.
+    """
+    return F.getIrrPoly().degree()
+
+def GetEltTable(F = FiniteField((1, 1, 0, 1))):
+    """
+    Returns an array of objects whose i-th entry is the FFieldElt of F whose
+    coefficients are the bits of i (bit j is the coefficient of x^j).
+
+    The table is only built once for each field, so unpacked transmissions
+    share these elements instead of creating an object for every entry.
+    """
+    key = tuple(F.getIrrPoly().coef)
+    if key not in eltTables:
+        k = GetDegree(F)
+        table = np.empty(F.getSize(), dtype = object)
+        for i in range(F.getSize()):
+            table[i] = FFieldElt(F, [(i >> j) & 1 for j in range(k)])
+        eltTables[key] = table
+    return eltTables[key]
+
+def GetValue(e):
+    """
+    Returns the int whose bits are the coefficients of the field element e
+    (bit j is the coefficient of x^j).
+
+    input: e = a FFieldElt object or one of the ints 0 and 1
+    """
+    if type(e) == FFieldElt:
+        value = 0
+        for (j, c) in enumerate(e.poly.coef):
+            value |= (int(c) % 2) << j
+        return value
+    if e == 0 or e == 1:
+        return int(e)
+    raise ValueError(str(e) + " is not a field element.")
+
+def BufferToArray(buf):
+    """
+    Returns an array of bytes sharing its memory with buf.
+
+    input: buf = a bytes, bytearray, memoryview or mmap object (or anything
+        else with the buffer protocol)
+    """
+    if isinstance(buf, memoryview):
+        return np.asarray(buf).view(np.uint8).reshape(-1)
+    return np.frombuffer(buf, dtype = np.uint8)
+
+def PackedSize(numElts, F = FiniteField((1, 1, 0, 1))):
+    """
+    Returns the number of bytes taken by numElts packed elements of F.
+    """
+    return (numElts*GetDegree(F) + 7)//8
+
+def GetValueType(F = FiniteField((1, 1, 0, 1))):
+    """
+    Returns the smallest unsigned integer type that holds the values of the
+    elements of F, e.g. uint8 for F_8 and F_256.
+    """
+    return np.min_scalar_type(F.getSize() - 1)
+
+def PackValues(values, F = FiniteField((1, 1, 0, 1)), out = None):
+    """
+    Returns a bytearray with the elements whose values are in values packed
+    into it, or writes them to the start of out if it is given and returns
+    the number of bytes written.
+
+    input: values = an array of ints less than the size of F
+        F = a FiniteField object (default F_8)
+        out = a writable buffer (bytearray, memoryview, mmap, ...) (optional)
+    """
+    k = GetDegree(F)
+    values = np.asarray(values).reshape(-1)
+    size = PackedSize(values.size, F)
+    if out is None:
+        out = bytearray(size)
+        result = out
+    else:
+        result = size
+    outArray = BufferToArray(out)
+    if outArray.size < size:
+        raise ValueError("The buffer is too small for the packed elements.")
+    if values.size == 0:
+        return result
+    if values.min() < 0 or values.max() >= F.getSize():
+        raise ValueError("The values are not all elements of the field.")
+    values = values.astype(GetValueType(F), copy = False)
+    outArray = outArray[:size]
+
+    if k == 8:
+        outArray[:] = values
+    elif k == 4:
+        # the first element of each byte goes in the high nibble
+        np.left_shift(values[0::2], 4, out = outArray)
+        outArray[:values.size//2] |= values[1::2]
+    else:
+        # CHUNK_SIZE elements take a whole number of bytes, so each chunk
+        # can be packed on its own
+        for i in range(0, values.size, CHUNK_SIZE):
+            chunk = values[i:i + CHUNK_SIZE]
+            # one row of bits for each element, highest degree first
+            bits = np.empty((chunk.size, k), dtype = np.uint8)
+            for j in range(k):
+                np.bitwise_and(chunk >> (k - 1 - j), 1, out = bits[:, j],
+                               casting = "unsafe")
+            packed = np.packbits(bits.reshape(-1))
+            start = i*k//8
+            outArray[start:start + packed.size] = packed
+    return result
+
+def UnpackValues(buf, numElts = None, F = FiniteField((1, 1, 0, 1))):
+    """
+    Returns an array with the values of the elements packed in buf.
+
+    input: buf = a buffer (bytes, bytearray, memoryview, mmap, ...)
+        numElts = the number of elements to unpack (default all the
+            elements that fit in buf)
+        F = a FiniteField object (default F_8)
+
+    For F_256 the array shares its memory with buf, otherwise it is a new
+    array with one entry for each element.
+    """
+    k = GetDegree(F)
+    data = BufferToArray(buf)
+    if numElts is None:
+        numElts = data.size*8//k
+    if PackedSize(numElts, F) > data.size:
+        raise ValueError("The buffer is too small for " + str(numElts) \
+                         + " elements.")
+    data = data[:PackedSize(numElts, F)]
+
+    if k == 8:
+        return data
+    values = np.empty(numElts, dtype = GetValueType(F))
+    if k == 4:
+        # the first element of each byte is in the high nibble
+        np.right_shift(data[:(numElts + 1)//2], 4, out = values[0::2])
+        np.bitwise_and(data[:numElts//2], 15, out = values[1::2])
+        return values
+
+    # unpack CHUNK_SIZE elements at a time, building each value from its
+    # bits, highest degree first
+    for i in range(0, numElts, CHUNK_SIZE):
+        m = min(CHUNK_SIZE, numElts - i)
+        start = i*k//8
+        bits = np.unpackbits(data[start:start + PackedSize(m, F)])[:m*k]
+        bits = bits.reshape(m, k)
+        chunk = values[i:i + m]
+        chunk[:] = bits[:, 0]
+        for j in range(1, k):
+            chunk <<= 1
+            chunk |= bits[:, j]
+    return values
+
+def PackTransmissions(Ts, F = FiniteField((1, 1, 0, 1)), out = None):
+    """
+    Packs a list of transmissions (or messages) into a bytearray, or into
+    out if it is given, see PackValues.
+
+    input: Ts = a list of tuples of field elements, or an array of their
+            values as returned by UnpackTransmissions
+        F = a FiniteField object (default F_8)
+        out = a writable buffer (optional)
+    """
+    Ts = np.asarray(Ts)
+    if Ts.dtype == object:
+        Ts = np.vectorize(GetValue, otypes = [np.int64])(Ts)
+    return PackValues(Ts, F, out)
+
+def UnpackTransmissions(buf, n = None, F = FiniteField((1, 1, 0, 1)),
+                        values = False, numTs = None):
+    """
+    Returns the transmissions packed in buf as an array with one row for
+    each transmission, which can be passed on to RS.RSDecodeBatch.
+
+    input: buf = a buffer (bytes, bytearray, memoryview, mmap, ...)
+        n = the length of each transmission (default the size of F)
+        F = a FiniteField object (default F_8)
+        values = if True, return the values of the elements instead of
+            FFieldElt objects
+        numTs = the number of transmissions to unpack (default all the
+            transmissions that fit in buf)
+
+    With the default numTs, any bits left over after the last whole
+    transmission are ignored, but padding can be read as an extra
+    transmission when n*k is less than 8 (see the note at the top).
+    """
+    if n is None:
+        n = F.getSize()
+    if numTs is None:
+        numTs = BufferToArray(buf).size*8//(n*GetDegree(F))
+    V = UnpackValues(buf, numTs*n, F).reshape(numTs, n)
+    if values:
+        return V
+    return GetEltTable(F)[V]
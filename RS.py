@@ -1,5 +1,6 @@
 from FiniteFields import *
 from itertools import combinations as combinations
+from math import factorial
 from LinearSolve import *
 import numpy as np
 
@@ -20,7 +21,141 @@ def MakeVandermondeMat(E):
     return np.mat(M)
 
 
-def FindPossSoln(T, l, F = FiniteField((1, 1, 0, 1))):
+def GetEvalPoint(i, F = FiniteField((1, 1, 0, 1))):
+    """
+    Returns the value at which the message polynomial is evaluated to give
+    entry i of a transmission, i.e. 0 for i = 0 and t^(i-1) otherwise.
+
+    input: i = an int representing the position in the transmission
+        F = a FiniteField object (default F_8)
+    """
+    if i == 0:
+        return 0
+    else:
+        return F.getEltFromPower(i-1)
+
+def ToFieldElt(e, F = FiniteField((1, 1, 0, 1))):
+    """
+    Returns e as a FFieldElt object of F so that the ints 0 and 1 can be
+    mixed with field elements in matrix products without being added as ints.
+
+    input: e = a FFieldElt object of F or one of the ints 0 and 1
+        F = a FiniteField object (default F_8)
+    """
+    if type(e) == FFieldElt:
+        return e
+    degree = F.getIrrPoly().degree()
+    if e == 0:
+        return FFieldElt(F, [0]*degree)
+    if e == 1:
+        return FFieldElt(F, [1] + [0]*(degree - 1))
+    raise ValueError(str(e) + " is not in the field.")
+
+# (Vinv, P) for each (field, message length), see GetCheckMatrices
+checkMatrices = {}
+
+def NumCombinations(n, l):
+    """
+    Returns the number of ways of choosing l of the n entries of a
+    transmission, i.e. the number of combinations tried by FindPossSoln.
+    """
+    return factorial(n)/(factorial(l)*factorial(n - l))
+
+def GetCheckMatrices(l, F = FiniteField((1, 1, 0, 1))):
+    """
+    Returns a tuple (Vinv, P) where Vinv is the inverse of the Vandermonde
+    matrix of the first l evaluation points and P gives the remaining
+    entries of a codeword from its first l entries, i.e. T is a codeword
+    exactly when P*T[:l] = T[l:].
+
+    input: l = an int representing the length of the message
+        F = a FiniteField object (default F_8)
+
+    The matrices are computed once for each field and message length and
+    cached in checkMatrices.
+    """
+    key = (tuple(F.getIrrPoly().coef), l)
+    if key in checkMatrices:
+        return checkMatrices[key]
+
+    n = F.getSize()
+    points = [GetEvalPoint(i, F) for i in range(n)]
+
+    # invert the Vandermonde matrix one column at a time
+    A = MakeVandermondeMat(points[:l])
+    Vinv = np.mat(np.empty((l, l), dtype = object))
+    for j in range(l):
+        e = np.mat(np.array([[ToFieldElt(int(i == j), F)] for i in range(l)],
+                            dtype = object))
+        Vinv[:, j] = LinearSolve(A, e)
+    Vinv = np.mat(np.vectorize(lambda e: ToFieldElt(e, F),
+                               otypes = [object])(Vinv))
+
+    # P = E*Vinv where E evaluates at the remaining points (if l = n there
+    # are no remaining points and every word is a codeword)
+    P = np.mat(np.empty((n - l, l), dtype = object))
+    if l < n:
+        E = np.mat(np.array([[ToFieldElt(p**i, F) for i in range(l)]
+                             for p in points[l:]], dtype = object))
+        P = E*Vinv
+
+    checkMatrices[key] = (Vinv, P)
+    return (Vinv, P)
+
+def ToFieldMat(Ts, F = FiniteField((1, 1, 0, 1))):
+    """
+    Returns a matrix of FFieldElt objects with one column for each of the
+    transmissions in Ts.
+
+    input: Ts = a list of transmissions
+        F = a FiniteField object (default F_8)
+    """
+    return np.mat(np.array([[ToFieldElt(e, F) for e in T] for T in Ts],
+                           dtype = object)).T
+
+def CheckCodewords(C, l, F = FiniteField((1, 1, 0, 1))):
+    """
+    Returns a list with True for each column of C that is a codeword and
+    False for each column that is not.
+
+    input: C = a matrix as returned by ToFieldMat
+        l = an int representing the length of the message
+        F = a FiniteField object (default F_8)
+    """
+    (Vinv, P) = GetCheckMatrices(l, F)
+    # the entries after the first l as given by the first l
+    R = np.array(P*C[:l])
+    C = np.array(C[l:])
+    return [all(R[i, j] == C[i, j] for i in range(R.shape[0]))
+            for j in range(C.shape[1])]
+
+def IsCodeword(T, l, F = FiniteField((1, 1, 0, 1))):
+    """
+    Returns True if the transmission T is a codeword, i.e. if all of its
+    entries agree with the message polynomial through its first l entries.
+
+    input: T = a tuple representing the transmission (len(T) = the size of F)
+        l = an int representing the length of the message
+        F = a FiniteField object (default F_8)
+    """
+    assert len(T) == F.size, "The transmission is not the right length."
+
+    return CheckCodewords(ToFieldMat([T], F), l, F)[0]
+
+def InterpolateSoln(T, l, F = FiniteField((1, 1, 0, 1))):
+    """
+    Returns the message polynomial through the first l entries of the
+    transmission T using the cached inverse Vandermonde matrix.
+
+    input: T = a tuple representing the transmission (len(T) = the size of F)
+        l = an int representing the length of the message
+        F = a FiniteField object (default F_8)
+    """
+    (Vinv, P) = GetCheckMatrices(l, F)
+    C = ToFieldMat([T[:l]], F)
+    return tuple(np.array(Vinv*C).flatten())
+
+def FindPossSoln(T, l, F = FiniteField((1, 1, 0, 1)), progress = None):
     """
     Returns a dictionary containing all the possible solutions with the number
     of times that they appear.
@@ -28,6 +163,8 @@ def FindPossSoln(T, l, F = FiniteField((1, 1, 0, 1))):
     input: T = a tuple representing the transmission (len(T) = the size of F)
         l = an int representing the length of the message
         F = a FiniteField object (default F_8)
+        progress = a function called as progress(count, total) after each
+            of the total combinations has been tried (optional)
 
     The transmission tuple T should be in the order (m(0), m(1), m(t), m(t^2),
     ..., m(t^k)) where t is the generator of the field and m(x) is the
@@ -39,24 +176,56 @@ def FindPossSoln(T, l, F = FiniteField((1, 1, 0, 1))):
 
     T = np.array(T)
     possSols = {}
-    for c in combinations(range(len(T)), l):
+    n = len(T)
+    total = NumCombinations(n, l)
+    count = 0
+    for c in combinations(range(n), l):
         outputValues = np.mat(T[np.array(c)])
-        inputValues = []
-        for i in c:
-            if i == 0:
-                inputValues.append(0)
-            else:
-                inputValues.append(F.getEltFromPower(i-1))
+        inputValues = [GetEvalPoint(i, F) for i in c]
         A = MakeVandermondeMat(inputValues)
         sol = tuple(np.array(LinearSolve(A, outputValues)).flatten())
         if sol in possSols.keys():
             possSols[sol] = possSols[sol] + 1
         else:
             possSols[sol] = 1
+        count += 1
+        if progress is not None:
+            progress(count, total)
     return possSols
 
-def RSDecode(T, l, F = FiniteField((1, 1, 0, 1)), showall  = False):
-    possSols = FindPossSoln(T, l, F)
+def RSDecode(T, l, F = FiniteField((1, 1, 0, 1)), showall  = False,
+             progress = None):
+    """
+    Returns the most common solution of FindPossSoln, or a list of all the
+    solutions with their counts if showall is True.
+
+    input: T = a tuple representing the transmission (len(T) = the size of F)
+        l = an int representing the length of the message
+        F = a FiniteField object (default F_8)
+        progress = a function passed on to FindPossSoln (optional)
+
+    If T is a codeword, every choice of l entries gives the same solution,
+    so it is found by interpolation instead of trying all the combinations.
+    """
+    assert len(T) == F.size, "The transmission is not the right length."
+
+    C = ToFieldMat([T], F)
+    if CheckCodewords(C, l, F)[0]:
+        (Vinv, P) = GetCheckMatrices(l, F)
+        soln = tuple(np.array(Vinv*C[:l]).flatten())
+        if showall == True:
+            n = len(T)
+            return [(soln, NumCombinations(n, l))]
+        return soln
+    return VoteSoln(FindPossSoln(T, l, F, progress), showall)
+
+def VoteSoln(possSols, showall = False):
+    """
+    Returns the solution in possSols with the most votes, or a list of all
+    the solutions with their counts if showall is True.
+
+    input: possSols = a dictionary as returned by FindPossSoln
+    """
     if showall == True:
         solns = []
         for s in possSols.keys():
@@ -71,6 +240,48 @@ def RSDecode(T, l, F = FiniteField((1, 1, 0, 1)), showall  = False):
                 count = possSols[soln]
         return soln
 
+def RSDecodeBatch(Ts, l, F = FiniteField((1, 1, 0, 1)), showall = False):
+    """
+    Returns a tuple (solns, clean, dirty) where solns[i] is RSDecode(Ts[i],
+    l, F, showall), clean is the list of indices of the transmissions that
+    are codewords and dirty is the list of indices of the rest.
+
+    input: Ts = a list of transmissions
+        l = an int representing the length of the message
+        F = a FiniteField object (default F_8)
+
+    All the transmissions are checked with a single matrix product and only
+    the dirty transmissions are decoded by FindPossSoln.
+    """
+    if len(Ts) == 0:
+        return ([], [], [])
+    for T in Ts:
+        assert len(T) == F.size, "The transmission is not the right length."
+
+    (Vinv, P) = GetCheckMatrices(l, F)
+    C = ToFieldMat(Ts, F)
+    clean = []
+    dirty = []
+    for (j, isCodeword) in enumerate(CheckCodewords(C, l, F)):
+        if isCodeword:
+            clean.append(j)
+        else:
+            dirty.append(j)
+
+    solns = [None]*len(Ts)
+    if len(clean) > 0:
+        M = np.array(Vinv*C[:l, clean])
+        n = F.size
+        numCombs = NumCombinations(n, l)
+        for (i, j) in enumerate(clean):
+            soln = tuple(M[:, i])
+            if showall == True:
+                solns[j] = [(soln, numCombs)]
+            else:
+                solns[j] = soln
+    for j in dirty:
+        solns[j] = VoteSoln(FindPossSoln(Ts[j], l, F), showall)
+    return (solns, clean, dirty)
 
 T = (t2, 0, 0, t4, t2, t, t4, t)
 G = FiniteField((1, 1, 0, 0, 1)) #F_16
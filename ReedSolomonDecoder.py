@@ -1,70 +1,167 @@
 import RS
 import FiniteFields as FF
 from Tkinter import *
+import threading
+import Queue
+
+# irreducible polynomials (a0, a1, ..., ak) with x as a generator
+FIELDS = [("F_8", (1, 1, 0, 1)),
+          ("F_16", (1, 1, 0, 0, 1)),
+          ("F_256", (1, 0, 1, 1, 1, 0, 0, 0, 1))]
+
+# FiniteField objects by irreducible polynomial, built by the first decode
+fieldCache = {}
+fieldCacheLock = threading.Lock()
+
+def GetField(irrPoly):
+    """
+    Returns the FiniteField object for the irreducible polynomial irrPoly,
+    building it only the first time since large fields are slow to build.
+    """
+    with fieldCacheLock:
+        if irrPoly not in fieldCache:
+            fieldCache[irrPoly] = FF.FiniteField(irrPoly)
+        return fieldCache[irrPoly]
+
+def ParseEntry(e, degree):
+    """
+    Returns the list of coefficients [a0, a1, ..., a(degree-1)] of the field
+    element written as the bit string e, e.g. "110" is x^2 + x.
+
+    input: e = a string of 0's and 1's starting with the coefficient of the
+        highest degree term (leading 0's can be left out)
+        degree = the degree of the irreducible polynomial of the field
+    """
+    e = e.strip()
+    if e == "" or len(e) > degree or e.strip("01") != "":
+        raise ValueError("\"" + e + "\" is not an element of the field.")
+    poly = []
+    for c in e:
+        poly += [int(c)]
+    poly.reverse()
+    return poly + [0]*(degree - len(poly))
+
+class DecodeCancelled(Exception):
+    pass
+
+class DecodeWorker(threading.Thread):
+    """
+    Decodes a transmission on a background thread.
+
+    Usage: DecodeWorker(irrPoly, polys, l)
+        irrPoly: the irreducible polynomial of the field
+        polys: a list of coefficient lists, one for each entry of the
+            transmission
+        l: the length of the message
+
+    The worker goes through the stages "field" (building the field),
+    "matrices" (building the check matrices), "check" (checking whether the
+    transmission is a codeword) and "decode", keeping the number of
+    combinations tried so far in count (out of total). The result is put
+    on results as ("done", soln), ("cancelled", None) or ("error", message).
+
+    Cancelling takes effect between the stages and between combinations;
+    building a large field cannot be interrupted.
+    """
+    def __init__(self, irrPoly, polys, l):
+        threading.Thread.__init__(self)
+        self.daemon = True
+        self.irrPoly = irrPoly
+        self.polys = polys
+        self.l = l
+        self.stage = "field"
+        self.count = 0
+        self.total = 0
+        self.cancelled = threading.Event()
+        self.results = Queue.Queue()
+
+    def cancel(self):
+        self.cancelled.set()
+
+    def checkCancelled(self):
+        if self.cancelled.is_set():
+            raise DecodeCancelled
+
+    def progress(self, count, total):
+        self.checkCancelled()
+        self.count = count
+        self.total = total
+
+    def run(self):
+        try:
+            F = GetField(self.irrPoly)
+            self.checkCancelled()
+            self.stage = "matrices"
+            RS.GetCheckMatrices(self.l, F)
+            self.checkCancelled()
+            self.stage = "check"
+            T = tuple(FF.FFieldElt(F, poly) for poly in self.polys)
+            if RS.IsCodeword(T, self.l, F):
+                soln = RS.InterpolateSoln(T, self.l, F)
+            else:
+                self.checkCancelled()
+                self.stage = "decode"
+                soln = RS.VoteSoln(RS.FindPossSoln(T, self.l, F,
+                                                   self.progress))
+            self.results.put(("done", soln))
+        except DecodeCancelled:
+            self.results.put(("cancelled", None))
+        except Exception as e:
+            self.results.put(("error", str(e)))
 
 class DecoderWindow(Tk):
+    # how often (in ms) the window checks on the worker
+    POLL_INTERVAL = 100
+
     def __init__(self, parent):
         Tk.__init__(self, parent)
         self.parent = parent
         self.title("Reed-Solomon Decoding")
-        
+        self.worker = None
+        self.entries = []
+
         self.initialize()
 
     def initialize(self):
         instructionsFrame = Frame(self)
         instructions = Label(instructionsFrame,
-                             text = "Input the received transmission.",
+                             text = "Choose the field and the length of the " \
+                             + "message, then input the received transmission.",
                              anchor = NW)
         instructions.pack(fill = X, padx = 5, pady = 5)
         instructionsFrame.pack(fill = BOTH)
 
-        transmissionFrame = Frame(self)
-        firstEntryLabel = Label(transmissionFrame, text = "m(0) = ")
-        firstEntryLabel.grid(row = 0, column = 0, sticky = E)
-        self.firstEntry = Entry(transmissionFrame, width = 5)
-        self.firstEntry.grid(row = 0, column = 1)
-
-        secondEntryLabel = Label(transmissionFrame, text = "m(1) = ")
-        secondEntryLabel.grid(row = 0, column = 2, sticky = E)
-        self.secondEntry = Entry(transmissionFrame, width = 5)
-        self.secondEntry.grid(row = 0, column = 3)
-
-        thirdEntryLabel = Label(transmissionFrame, text = "m(t) = ")
-        thirdEntryLabel.grid(row = 0, column = 4, sticky = E)
-        self.thirdEntry = Entry(transmissionFrame, width = 5)
-        self.thirdEntry.grid(row = 0, column = 5)
-
-        fourthEntryLabel = Label(transmissionFrame, text = "m(t^2) = ")
-        fourthEntryLabel.grid(row = 0, column = 6, sticky = E)
-        self.fourthEntry = Entry(transmissionFrame, width = 5)
-        self.fourthEntry.grid(row = 0, column = 7)
-
-        fifthEntryLabel = Label(transmissionFrame, text = "m(t^3) = ")
-        fifthEntryLabel.grid(row = 1, column = 0, sticky = E)
-        self.fifthEntry = Entry(transmissionFrame, width = 5)
-        self.fifthEntry.grid(row = 1, column = 1)
-
-        sixthEntryLabel = Label(transmissionFrame, text = "m(t^4) = ")
-        sixthEntryLabel.grid(row = 1, column = 2, sticky = E)
-        self.sixthEntry = Entry(transmissionFrame, width = 5)
-        self.sixthEntry.grid(row = 1, column = 3)
-
-        seventhEntryLabel = Label(transmissionFrame, text = "m(t^5) = ")
-        seventhEntryLabel.grid(row = 1, column = 4, sticky = E)
-        self.seventhEntry = Entry(transmissionFrame, width = 5)
-        self.seventhEntry.grid(row = 1, column = 5)
-
-        eighthEntryLabel = Label(transmissionFrame, text = "m(t^6) = ")
-        eighthEntryLabel.grid(row = 1, column = 6, sticky = E)
-        self.eighthEntry = Entry(transmissionFrame, width = 5)
-        self.eighthEntry.grid(row = 1, column = 7)
-        
-        transmissionFrame.pack(ipadx = 20)
+        codeFrame = Frame(self)
+        fieldLabel = Label(codeFrame, text = "Field: ")
+        fieldLabel.grid(row = 0, column = 0, sticky = E)
+        self.fieldName = StringVar()
+        self.fieldName.set(FIELDS[0][0])
+        fieldMenu = OptionMenu(codeFrame, self.fieldName,
+                               *[name for (name, irrPoly) in FIELDS])
+        fieldMenu.grid(row = 0, column = 1)
+
+        lengthLabel = Label(codeFrame, text = "Message length: ")
+        lengthLabel.grid(row = 0, column = 2, sticky = E)
+        self.lengthEntry = Entry(codeFrame, width = 5)
+        self.lengthEntry.insert(0, "4")
+        self.lengthEntry.grid(row = 0, column = 3)
+
+        setUpButton = Button(codeFrame, text = "Set up",
+                             command = self.makeEntries)
+        setUpButton.grid(row = 0, column = 4, padx = 5)
+        codeFrame.pack(pady = 5)
+
+        self.transmissionFrame = Frame(self)
+        self.transmissionFrame.pack(ipadx = 20)
 
         decodeButtonFrame = Frame(self)
-        decodeButton = Button(decodeButtonFrame, text = "Decode", command = self.decode)
-        decodeButton.pack(pady = 5, padx = 5)
-        decodeButtonFrame.pack(fill = BOTH)
+        self.decodeButton = Button(decodeButtonFrame, text = "Decode",
+                                   command = self.decode)
+        self.decodeButton.pack(side = LEFT, pady = 5, padx = 5)
+        self.cancelButton = Button(decodeButtonFrame, text = "Cancel",
+                                   command = self.cancel, state = DISABLED)
+        self.cancelButton.pack(side = LEFT, pady = 5, padx = 5)
+        decodeButtonFrame.pack()
 
         resultsFrame = Frame(self)
         self.resultsText = StringVar()
@@ -72,38 +169,123 @@ class DecoderWindow(Tk):
         results.pack(fill = X, pady = 5, padx = 5)
         resultsFrame.pack(fill = BOTH)
 
+        self.makeEntries()
+
+    def getIrrPoly(self):
+        return dict(FIELDS)[self.fieldName.get()]
+
+    def makeEntries(self):
+        """
+        Replaces the entry fields with one for each element of the chosen
+        field, labelled m(0), m(1), m(t), m(t^2), ...
+        """
+        if self.worker is not None:
+            return
+        for child in self.transmissionFrame.winfo_children():
+            child.destroy()
+        degree = len(self.getIrrPoly()) - 1
+        size = 2**degree
+        entriesPerRow = max(4, int(size**0.5))
+
+        self.entries = []
+        for i in range(size):
+            if i == 0:
+                name = "m(0) = "
+            elif i == 1:
+                name = "m(1) = "
+            elif i == 2:
+                name = "m(t) = "
+            else:
+                name = "m(t^" + str(i - 1) + ") = "
+            row = i // entriesPerRow
+            column = 2*(i % entriesPerRow)
+            entryLabel = Label(self.transmissionFrame, text = name)
+            entryLabel.grid(row = row, column = column, sticky = E)
+            entry = Entry(self.transmissionFrame, width = degree + 2)
+            entry.grid(row = row, column = column + 1)
+            self.entries.append(entry)
+        self.entriesPoly = self.getIrrPoly()
+        self.resultsText.set("")
+
     def decode(self):
-        T = self.getTransmission()
-        results = RS.RSDecode(tuple(T), 4)
-        self.resultsText.set(str(results))
+        if self.worker is not None:
+            return
+        try:
+            polys = self.getTransmission()
+            l = int(self.lengthEntry.get())
+            if l < 1 or l > len(polys):
+                raise ValueError("The message length should be between 1 " \
+                                 + "and " + str(len(polys)) + ".")
+        except ValueError as e:
+            self.resultsText.set(str(e))
+            return
+        self.worker = DecodeWorker(self.entriesPoly, polys, l)
+        self.worker.start()
+        self.decodeButton.config(state = DISABLED)
+        self.cancelButton.config(state = NORMAL)
+        self.resultsText.set("Decoding...")
+        self.after(self.POLL_INTERVAL, self.poll, self.worker)
+
+    def cancel(self):
+        """
+        Cancels the decoding and frees the window straight away. The worker
+        stops on its own once it reaches a point where it can be cancelled,
+        e.g. after building the field, which is then kept for the next decode.
+        """
+        if self.worker is not None:
+            self.worker.cancel()
+            self.finish("Cancelled.")
+
+    def finish(self, text):
+        self.resultsText.set(text)
+        self.worker = None
+        self.decodeButton.config(state = NORMAL)
+        self.cancelButton.config(state = DISABLED)
+
+    def poll(self, worker):
+        """
+        Shows the progress of the worker and, once it has finished, its
+        result. Runs on the Tk thread through after().
+        """
+        if worker is not self.worker:
+            # the worker was cancelled
+            return
+        try:
+            (status, result) = worker.results.get_nowait()
+        except Queue.Empty:
+            if worker.stage == "field":
+                self.resultsText.set("Building field...")
+            elif worker.stage == "matrices":
+                self.resultsText.set("Building check matrices...")
+            elif worker.stage == "check":
+                self.resultsText.set("Checking the transmission...")
+            elif worker.total > 0:
+                self.resultsText.set("Decoding... " + str(worker.count) \
+                                     + " of " + str(worker.total) \
+                                     + " combinations")
+            else:
+                self.resultsText.set("Decoding...")
+            self.after(self.POLL_INTERVAL, self.poll, worker)
+            return
+        if status == "done":
+            self.finish(str(result))
+        elif status == "cancelled":
+            self.finish("Cancelled.")
+        else:
+            self.finish("Error: " + result)
 
     def getTransmission(self):
-        e1 = self.firstEntry.get()
-        e2 = self.secondEntry.get()
-        e3 = self.thirdEntry.get()
-        e4 = self.fourthEntry.get()
-        e5 = self.fifthEntry.get()
-        e6 = self.sixthEntry.get()
-        e7 = self.seventhEntry.get()
-        e8 = self.eighthEntry.get()
+        """
+        Returns the transmission in the entry fields as a list of coefficient
+        lists, one for each entry.
+        """
+        degree = len(self.entriesPoly) - 1
         transmission = []
-        for e in (e1, e2, e3, e4, e5, e6, e7, e8):
-            if e == "1":
-                transmission += [FF.FFieldElt(FF.FiniteField((1, 1, 0, 1)),
-                                              [1, 0, 0])]
-            elif e == "0":
-                transmission += [FF.FFieldElt(FF.FiniteField((1, 1, 0, 1)),
-                                             [0, 0, 0])]
-            else:
-                poly = []
-                for c in e:
-                    poly += [int(c)]
-                poly.reverse()
-                transmission += [FF.FFieldElt(FF.FiniteField((1, 1, 0, 1)),
-                                         poly)]
+        for entry in self.entries:
+            transmission += [ParseEntry(entry.get(), degree)]
         return transmission
-        
-    
+
+
 if __name__ == "__main__":
     decoder = DecoderWindow(None)
     decoder.mainloop()